@@ -0,0 +1,20 @@
+"""JSON to and from bytes: orjson when installed, else compact stdlib json."""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: pip install 'ytm[fast]'
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+
+    def dumps(obj: object) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def loads(data: bytes | bytearray | memoryview) -> object:
+        # str() decodes any buffer, so memoryview slices work like orjson's
+        return json.loads(str(data, "utf-8"))
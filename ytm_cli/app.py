@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import subprocess
+import functools
+import logging
+import threading
 from shutil import which
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Iterator
 
 from textual import on, work
 from textual.app import App, ComposeResult
@@ -14,13 +15,25 @@ from textual.binding import Binding
 from textual.containers import Container, Horizontal
 from textual.widgets import DataTable, Footer, Header, Input, Label, Static
 from textual.worker import get_current_worker
+from rich.markup import render
+from rich.style import Style
 from rich.text import Text
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError, ExtractorError
 
 from ytm_cli.player import MpvPlayer
+from ytm_cli.ttl_cache import TTLCache, ttl_cache
 
 if TYPE_CHECKING:
+    from textual.timer import Timer
+
     from ytm_cli.net import JukeboxClient, JukeboxServer
 
+log = logging.getLogger(__name__)
+# yt-dlp reports errors through this logger; keep them off the terminal
+# Textual is drawing on.
+log.addHandler(logging.NullHandler())
+
 # ── Constants ───────────────────────────────────────────────────────
 
 WELCOME = """\
@@ -33,9 +46,29 @@ WELCOME = """\
 
 [dim italic]Type a query above and press Enter[/]
 """
+_WELCOME_TEXT = render(WELCOME)
 
 BLOCKS = " ▏▎▍▌▋▊▉█"
 
+# Parsed once so table rows and the now-playing bar don't re-parse style
+# strings or markup on every render
+_S_IDX = Style.parse("bold cyan")
+_S_CHANNEL = Style.parse("green")
+_S_DIM = Style.parse("dim")
+_S_BOLD = Style.parse("bold")
+_S_BAR = Style.parse("magenta")
+
+# Signed googlevideo stream URLs stay valid for about six hours.
+STREAM_TTL = 5 * 60 * 60
+SEARCH_TTL = 5 * 60
+# Live search waits for this much idle typing, and this many characters
+SEARCH_DEBOUNCE = 0.25
+MIN_LIVE_QUERY = 3
+# Results are pushed to the table this many at a time while streaming in
+SEARCH_BATCH = 3
+# Start resolving the next queued stream once playback passes this point.
+PREFETCH_AT = 0.8
+
 
 # ── Helpers ─────────────────────────────────────────────────────────
 
@@ -43,60 +76,186 @@ BLOCKS = " ▏▎▍▌▋▊▉█"
 def fmt_dur(sec: int | float | None) -> str:
     if not sec:
         return "--:--"
-    s = int(sec)
+    # Key the cache on whole seconds; float playheads would never hit it
+    return _fmt_secs(int(sec))
+
+
+@functools.lru_cache(maxsize=8192)
+def _fmt_secs(s: int) -> str:
+    if s < 60:
+        return f"0:{s:02d}"
     m, s = divmod(s, 60)
     h, m = divmod(m, 60)
     return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
 
 
+_BARS: dict[int, tuple[str, str]] = {}
+
+
 def progress_bar(ratio: float, width: int) -> str:
     """Smooth Unicode progress bar using 1/8-block characters."""
+    bars = _BARS.get(width)
+    if bars is None:
+        bars = _BARS[width] = ("█" * width, "─" * width)
+    full_bar, empty_bar = bars
     ratio = max(0.0, min(1.0, ratio))
     eighths = int(ratio * width * 8)
     full, partial = divmod(eighths, 8)
     empty = width - full - (1 if partial else 0)
-    return "█" * full + (BLOCKS[partial] if partial else "") + "─" * max(0, empty)
+    return full_bar[:full] + (BLOCKS[partial] if partial else "") + empty_bar[:empty]
+
+
+def _result_row(i: int, e: dict) -> tuple[Text, ...]:
+    return (
+        Text(str(i), style=_S_IDX),
+        Text(e.get("title", "Unknown")),
+        Text(e.get("channel", e.get("uploader", "?")), style=_S_CHANNEL),
+        Text(fmt_dur(e.get("duration")), style=_S_DIM),
+    )
+
+
+def _queue_row(i: int, e: dict) -> tuple[Text, ...]:
+    return (
+        Text(str(i), style=_S_IDX),
+        Text(e.get("title", "Unknown")),
+        Text(fmt_dur(e.get("duration")), style=_S_DIM),
+    )
+
+
+def _update_rows(
+    table: DataTable,
+    shown: list[str | None],
+    entries: list[dict],
+    make_row: Callable[[int, dict], tuple[Text, ...]],
+) -> list[str | None]:
+    """Bring ``table`` in line with ``entries``; returns the new id list.
+
+    ``shown`` is the id list from the previous call. When the table already
+    holds a prefix of ``entries`` (appends, repeated syncs) only the new
+    tail is added; anything else rebuilds, since row numbers shift.
+    """
+    ids = [e.get("id") for e in entries]
+    start = len(shown)
+    if ids[:start] != shown:
+        table.clear()
+        start = 0
+    if start < len(entries):
+        table.add_rows(
+            make_row(i, e) for i, e in enumerate(entries[start:], start + 1)
+        )
+    return ids
+
 
+# One extractor shared by every worker. YoutubeDL keeps its cookie jar and
+# extractor instances between calls but isn't thread-safe, hence the lock.
+_YDL = YoutubeDL(
+    {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "extract_flat": "in_playlist",
+        "format": "bestaudio",
+        "logger": log,
+    }
+)
+_YDL_LOCK = threading.Lock()
 
-def yt_search(query: str, count: int = 10) -> list[dict]:
-    """Search YouTube via yt-dlp. Blocks."""
+
+def _extract(url: str) -> dict | None:
     try:
-        r = subprocess.run(
-            [
-                "yt-dlp",
-                f"ytsearch{count}:{query}",
-                "--dump-json",
-                "--flat-playlist",
-                "--no-warnings",
-                "--quiet",
-            ],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return []
-    entries = []
-    for line in r.stdout.strip().splitlines():
-        try:
-            entries.append(json.loads(line))
-        except (json.JSONDecodeError, ValueError):
-            pass
-    return entries
+        with _YDL_LOCK:
+            info = _YDL.extract_info(url, download=False)
+    except DownloadError:
+        return None
+    return info
 
 
-def get_stream(url: str) -> str | None:
-    """Extract best audio URL via yt-dlp. Blocks."""
+def _entry(info: dict) -> dict:
+    """Trim a yt-dlp info dict to the fields ytm uses and sends to clients.
+
+    The full dict (every format, thumbnail, subtitle track…) runs to
+    hundreds of KB.
+    """
+    return {
+        "id": info["id"],
+        "title": info.get("title") or "Unknown",
+        "channel": info.get("channel") or info.get("uploader") or "?",
+        "duration": info.get("duration"),
+    }
+
+
+@ttl_cache(STREAM_TTL)
+def get_info(url: str) -> dict | None:
+    """Extract a URL's metadata and audio URL via yt-dlp. Blocks; cached."""
+    info = _extract(url)
+    if not info or "id" not in info:
+        return None
+    return {**_entry(info), "url": info.get("url")}
+
+
+def _iter_search(query: str, count: int) -> Iterator[dict]:
+    """Yield YouTube search results as yt-dlp pages them in. Blocks."""
     try:
-        r = subprocess.run(
-            ["yt-dlp", "-f", "bestaudio", "-g", "--no-warnings", "--quiet", url],
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        return r.stdout.strip() or None
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+        # process=False hands back yt-dlp's lazy entries generator
+        with _YDL_LOCK:
+            info = _YDL.extract_info(
+                f"ytsearch{count}:{query}", download=False, process=False
+            )
+        entries = iter(info.get("entries") or ())
+        while True:
+            # Fetching the next page runs the extractor, so it needs the
+            # lock; but not while the caller handles what was yielded
+            with _YDL_LOCK:
+                e = next(entries, None)
+            if e is None:
+                return
+            if e.get("id"):
+                yield _entry(e)
+    except (DownloadError, ExtractorError):
+        return
+
+
+_SEARCH_CACHE = TTLCache(SEARCH_TTL)
+
+
+def yt_search(query: str, count: int = 10) -> Iterator[tuple[list[dict], bool]]:
+    """Search YouTube via yt-dlp. Blocks; cached.
+
+    Yields ``(results so far, done)``: every SEARCH_BATCH results while
+    yt-dlp pages them in, then the complete list with ``done`` set. Only
+    complete lists are cached, and a cache hit is yielded at once.
+    """
+    key = (query, count)
+    entries = _SEARCH_CACHE.get(key)
+    if entries is None:
+        entries = []
+        for entry in _iter_search(query, count):
+            entries.append(entry)
+            if len(entries) % SEARCH_BATCH == 0:
+                yield entries[:], False
+        if entries:
+            _SEARCH_CACHE.set(key, entries)
+    yield entries, True
+
+
+@functools.lru_cache(maxsize=None)
+def _has(cmd: str) -> bool:
+    """Whether ``cmd`` is on PATH; probed once per process."""
+    return which(cmd) is not None
+
+
+def watch_url(entry: dict) -> str:
+    vid = entry.get("id", entry.get("url", ""))
+    return f"https://www.youtube.com/watch?v={vid}"
+
+
+@ttl_cache(STREAM_TTL)
+def get_stream(url: str) -> str | None:
+    """Extract best audio URL via yt-dlp. Blocks; cached."""
+    info = _extract(url)
+    if not info:
         return None
+    return info.get("url")
 
 
 # ── App ─────────────────────────────────────────────────────────────
@@ -203,16 +362,45 @@ class YtmApp(App):
         self.player = MpvPlayer() if mode != "client" else None
         self._results: list[dict] = []
         self._queue: list[dict] = []
+        # Entry ids currently shown in the results / queue tables
+        self._result_ids: list[str | None] = []
+        self._queue_ids: list[str | None] = []
         self._track: dict | None = None
         self._loading = False
+        self._prefetched: dict | None = None
+        self._ticker: Timer | None = None
+        self._search_timer: Timer | None = None
+        self._last_np_key: tuple | None = None
+        self._last_sync_key: tuple | None = None
+        # Bumped by _refresh_queue, which runs after every queue mutation
+        self._queue_version = 0
+        self._sync_msg: dict = {
+            "type": "sync",
+            "queue": [],
+            "track": None,
+            "position": 0.0,
+            "duration": 0.0,
+            "paused": False,
+        }
+        self._tick_msg: dict = {"type": "tick", "position": 0.0, "paused": False}
+        self._sync_state: dict = {}
         self._play_url = play_url
+        # Strong refs so fire-and-forget tasks aren't GC'd mid-flight
+        self._bg_tasks: set[asyncio.Task] = set()
+
+    def _spawn(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        """Run a coroutine in the background on the running loop."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        return task
 
     def compose(self) -> ComposeResult:
         yield Header()
         yield Input(placeholder="Search YouTube…", id="search")
         with Horizontal(id="main"):
             with Container(id="results-panel"):
-                yield Static(WELCOME, id="welcome")
+                yield Static(_WELCOME_TEXT, id="welcome")
                 yield DataTable(id="results", classes="hidden")
             with Container(id="queue-panel"):
                 yield Label("Queue", id="queue-title")
@@ -232,18 +420,23 @@ class YtmApp(App):
         q.cursor_type = "row"
 
         # Dependency check
-        deps = ["yt-dlp"] if self._mode == "client" else ["yt-dlp", "mpv"]
-        missing = [c for c in deps if not which(c)]
+        deps = [] if self._mode == "client" else ["mpv"]
+        missing = [c for c in deps if not _has(c)]
         if missing:
             self.notify(f"Missing: {', '.join(missing)}", severity="error", timeout=10)
 
-        # Progress timer
-        self.set_interval(0.5, self._tick)
+        # Progress timer. Clients get state pushed from the host and never
+        # need it; locally it only runs while a track is loaded. The host
+        # keeps it running so queue changes reach clients.
+        if self._mode != "client":
+            self._ticker = self.set_interval(
+                0.5, self._tick, pause=self._mode == "local"
+            )
 
         # Network setup
         if self._mode == "host" and self._server:
             self._server.on_add = self._on_remote_add
-            asyncio.get_event_loop().create_task(self._server.start())
+            self._spawn(self._server.start())
             self.sub_title = f"hosting on :{self._server.port}"
 
         if self._mode == "client" and self._client:
@@ -255,37 +448,54 @@ class YtmApp(App):
 
     # ── Search ──────────────────────────────────────────────────
 
+    @on(Input.Changed, "#search")
+    def _on_search_typed(self, event: Input.Changed) -> None:
+        """Search as the user types, once they pause for SEARCH_DEBOUNCE."""
+        if self._search_timer:
+            self._search_timer.stop()
+            self._search_timer = None
+        query = event.value.strip()
+        if len(query) >= MIN_LIVE_QUERY:
+            self._search_timer = self.set_timer(
+                SEARCH_DEBOUNCE, lambda: self._do_search(query, submitted=False)
+            )
+
     @on(Input.Submitted, "#search")
     def _on_search(self, event: Input.Submitted) -> None:
+        if self._search_timer:
+            self._search_timer.stop()
+            self._search_timer = None
         query = event.value.strip()
         if not query:
             return
         self._do_search(query)
 
     @work(thread=True, exclusive=True, group="search")
-    def _do_search(self, query: str) -> None:
+    def _do_search(self, query: str, submitted: bool = True) -> None:
+        # exclusive=True already cancels the previous search worker; a
+        # superseded search stops at its next result.
+        worker = get_current_worker()
         self.call_from_thread(setattr, self, "sub_title", "searching…")
-        entries = yt_search(query)
-        if not get_current_worker().is_cancelled:
-            self.call_from_thread(self._populate_results, entries)
+        # Show results in batches while yt-dlp is still fetching
+        for entries, done in yt_search(query):
+            if worker.is_cancelled:
+                return
+            self.call_from_thread(self._populate_results, entries, submitted and done)
+        if not worker.is_cancelled:
             self.call_from_thread(setattr, self, "sub_title", "stream youtube audio")
 
-    def _populate_results(self, entries: list[dict]) -> None:
+    def _populate_results(self, entries: list[dict], submitted: bool = True) -> None:
         self._results = entries
         self.query_one("#welcome").add_class("hidden")
         table = self.query_one("#results", DataTable)
         table.remove_class("hidden")
-        table.clear()
-
-        for i, e in enumerate(entries, 1):
-            table.add_row(
-                Text(str(i), style="bold cyan"),
-                Text(e.get("title", "Unknown")),
-                Text(e.get("channel", e.get("uploader", "?")), style="green"),
-                Text(fmt_dur(e.get("duration")), style="dim"),
-                key=str(i),
-            )
+        self._result_ids = _update_rows(
+            table, self._result_ids, entries, _result_row
+        )
 
+        # Live results mustn't steal focus from the search box mid-typing
+        if not submitted:
+            return
         if entries:
             table.focus()
             table.move_cursor(row=0)
@@ -300,7 +510,7 @@ class YtmApp(App):
         if 0 <= idx < len(self._results):
             entry = self._results[idx]
             if self._mode == "client" and self._client:
-                asyncio.get_event_loop().create_task(self._client.send_add(entry))
+                self._spawn(self._client.send_add(entry))
                 self.notify(f"Sent: {entry.get('title', '?')}", timeout=2)
             else:
                 self._play_entry(entry)
@@ -320,13 +530,11 @@ class YtmApp(App):
         """Fetch stream URL and start mpv."""
         self._loading = True
         self._track = entry
-        vid = entry.get("id", entry.get("url", ""))
         title = entry.get("title", "Unknown")
-        url = f"https://www.youtube.com/watch?v={vid}"
 
         self.call_from_thread(self._show_np_loading, title)
 
-        stream = get_stream(url)
+        stream = get_stream(watch_url(entry))
         if get_current_worker().is_cancelled:
             self._loading = False
             return
@@ -347,27 +555,22 @@ class YtmApp(App):
     def _play_from_url(self, url: str) -> None:
         """Fetch info for a URL then play it."""
         self._loading = True
-        entry: dict = {"id": url, "title": url, "channel": "—", "duration": None}
-        try:
-            r = subprocess.run(
-                ["yt-dlp", "--dump-json", "--no-warnings", "--quiet", url],
-                capture_output=True,
-                text=True,
-                timeout=15,
-            )
-            if r.stdout.strip():
-                entry = json.loads(r.stdout.strip())
-        except Exception:
-            pass
+        info = get_info(url)
+        if info:
+            # Keep the signed stream URL out of the broadcast track
+            entry = {k: v for k, v in info.items() if k != "url"}
+            stream = info["url"]
+        else:
+            entry = {"id": url, "title": url, "channel": "—", "duration": None}
+            stream = None
 
         self._track = entry
         title = entry.get("title", "Unknown")
-        vid = entry.get("id", url)
-        yt_url = f"https://www.youtube.com/watch?v={vid}"
 
         self.call_from_thread(self._show_np_loading, title)
 
-        stream = get_stream(yt_url)
+        # The metadata lookup already resolved the stream for single videos
+        stream = stream or get_stream(watch_url(entry))
         if get_current_worker().is_cancelled:
             self._loading = False
             return
@@ -384,23 +587,28 @@ class YtmApp(App):
         self.player.play(stream, title)
         self._loading = False
 
+    @work(thread=True, group="prefetch")
+    def _prefetch(self, entry: dict) -> None:
+        """Resolve a queued track's stream ahead of time to warm the cache."""
+        get_stream(watch_url(entry))
+
     def _show_np_loading(self, title: str) -> None:
+        if self._ticker:
+            self._ticker.resume()
         np = self.query_one("#np", Static)
         np.add_class("active")
-        np.update(f"  [dim]Loading:[/] [bold]{title}[/]")
+        np.update(Text.assemble("  ", ("Loading:", _S_DIM), " ", (title, _S_BOLD)))
+        self._last_np_key = None
 
     def _hide_np(self) -> None:
         np = self.query_one("#np", Static)
         np.remove_class("active")
+        self._last_np_key = None
 
     # ── Progress tick ───────────────────────────────────────────
 
     def _tick(self) -> None:
         """Called every 0.5s to update now-playing bar and detect track end."""
-        # Client gets state from network, not local player
-        if self._mode == "client":
-            return
-
         pos = 0.0
         dur = 0.0
         paused = False
@@ -422,24 +630,44 @@ class YtmApp(App):
                 paused = self.player.paused
                 self._render_np(self._track, pos, dur, paused)
 
+                # Hide the next track's extraction latency behind this one
+                if (
+                    self._queue
+                    and self._queue[0] is not self._prefetched
+                    and dur > 0
+                    and pos / dur > PREFETCH_AT
+                ):
+                    self._prefetched = self._queue[0]
+                    self._prefetch(self._prefetched)
+        elif self._mode == "local" and not self._loading and self._ticker:
+            # Nothing playing: stop polling until the next track loads
+            self._ticker.pause()
+
         # Broadcast state to clients (host mode)
         if self._mode == "host" and self._server:
             n = self._server.client_count
-            self.sub_title = (
+            sub_title = (
                 f"hosting on :{self._server.port} · {n} client{'s' * (n != 1)}"
                 if n
                 else f"hosting on :{self._server.port}"
             )
-            self._server.broadcast(
-                {
-                    "type": "sync",
-                    "queue": self._queue,
-                    "track": self._track,
-                    "position": pos,
-                    "duration": dur,
-                    "paused": paused,
-                }
-            )
+            if sub_title != self.sub_title:
+                self.sub_title = sub_title
+            # Full state only when the track, queue or duration changed;
+            # otherwise just the playhead. Both messages are reused and
+            # patched in place; broadcast encodes them immediately.
+            key = (self._queue_version, id(self._track), dur)
+            if key != self._last_sync_key:
+                self._last_sync_key = key
+                msg = self._sync_msg
+                msg["queue"] = self._queue
+                msg["track"] = self._track
+                msg["duration"] = dur
+            else:
+                msg = self._tick_msg
+            msg["position"] = pos
+            msg["paused"] = paused
+            self._server.broadcast(msg)
 
     def _render_np(
         self, track: dict, pos: float, dur: float, paused: bool
@@ -450,29 +678,50 @@ class YtmApp(App):
 
         w = max(self.size.width - 6, 20)
         ratio = pos / dur if dur > 0 else 0
+
+        # Skip the widget update unless something visible changed: the
+        # timestamp, a bar step, or the surrounding labels.
+        key = (
+            title,
+            artist,
+            int(pos),
+            int(dur),
+            paused,
+            len(self._queue),
+            w,
+            int(max(0.0, min(1.0, ratio)) * w * 8),
+        )
+        if key == self._last_np_key:
+            return
+        self._last_np_key = key
+
         pbar = progress_bar(ratio, w)
         icon = "⏸" if paused else "♫"
         ts = f"{fmt_dur(pos)} / {fmt_dur(dur)}"
-        qi = f"  [dim]Queue: {len(self._queue)}[/]" if self._queue else ""
+        qi = f"  Queue: {len(self._queue)}" if self._queue else ""
 
         np_widget = self.query_one("#np", Static)
         np_widget.add_class("active")
         np_widget.update(
-            f"  {icon} [bold]{title}[/] · [green]{artist}[/]{qi}\n"
-            f"  [magenta]{pbar}[/]  [dim]{ts}[/]"
+            Text.assemble(
+                f"  {icon} ",
+                (title, _S_BOLD),
+                " · ",
+                (artist, _S_CHANNEL),
+                (qi, _S_DIM),
+                "\n  ",
+                (pbar, _S_BAR),
+                "  ",
+                (ts, _S_DIM),
+            )
         )
 
     # ── Queue ───────────────────────────────────────────────────
 
     def _refresh_queue(self) -> None:
+        self._queue_version += 1
         qt = self.query_one("#queue-list", DataTable)
-        qt.clear()
-        for i, e in enumerate(self._queue, 1):
-            qt.add_row(
-                Text(str(i), style="bold cyan"),
-                Text(e.get("title", "Unknown")),
-                Text(fmt_dur(e.get("duration")), style="dim"),
-            )
+        self._queue_ids = _update_rows(qt, self._queue_ids, self._queue, _queue_row)
         lbl = self.query_one("#queue-title", Label)
         n = len(self._queue)
         lbl.update(f"Queue · {n}" if n else "Queue")
@@ -516,7 +765,7 @@ class YtmApp(App):
         if 0 <= idx < len(self._results):
             entry = self._results[idx]
             if self._mode == "client" and self._client:
-                asyncio.get_event_loop().create_task(self._client.send_add(entry))
+                self._spawn(self._client.send_add(entry))
                 self.notify(f"Sent: {entry.get('title', '?')}", timeout=2)
             else:
                 self._queue.append(entry)
@@ -557,13 +806,15 @@ class YtmApp(App):
         if self.player and self.player.is_running:
             self.player.seek(-10)
 
-    def action_quit(self) -> None:
+    async def action_quit(self) -> None:
         if self.player:
             self.player.stop()
         if self._server:
-            asyncio.get_event_loop().create_task(self._server.stop())
+            self._spawn(self._server.stop())
         if self._client:
-            asyncio.get_event_loop().create_task(self._client.close())
+            self._spawn(self._client.close())
+        # Let pending sends and the network shutdown finish first
+        await asyncio.gather(*self._bg_tasks, return_exceptions=True)
         self.exit()
 
     # ── Network (host mode) ────────────────────────────────────
@@ -592,14 +843,22 @@ class YtmApp(App):
         self.notify("Disconnected from host", severity="error", timeout=10)
 
     def _apply_sync(self, state: dict) -> None:
-        """Apply a state snapshot received from the host.
+        """Apply a state update received from the host.
+
+        A "sync" carries the full state; a "tick" only the playhead, which
+        is merged into the last sync without rebuilding the queue.
 
         Called from the async event loop (not a thread), so we can
         touch widgets directly.
         """
-        self._queue = state.get("queue", [])
-        self._track = state.get("track")
-        self._refresh_queue()
+        if state.get("type") == "tick":
+            self._sync_state.update(state)
+            state = self._sync_state
+        else:
+            self._sync_state = state
+            self._queue = state.get("queue", [])
+            self._track = state.get("track")
+            self._refresh_queue()
 
         if self._track:
             pos = state.get("position", 0)
@@ -1,11 +1,20 @@
 """LAN shared queue networking for ytm."""
 
 import asyncio
-import json
 import logging
 from typing import Callable
 
+from ytm_cli import _json
+
 DEFAULT_PORT = 7685
+# Bumped when the wire format changes; sent in the client's hello
+PROTOCOL_VERSION = 2
+# Frames claiming to be larger than this are rejected
+MAX_FRAME = 4 * 1024 * 1024
+# Frames larger than this are parsed off the event loop
+OFFLOAD_PARSE = 64 * 1024
+# Messages buffered per client before a slow reader gets resynced
+OUTBOX_SIZE = 4
 
 log = logging.getLogger(__name__)
 
@@ -14,21 +23,32 @@ log = logging.getLogger(__name__)
 
 
 def encode_msg(msg: dict) -> bytes:
-    """Encode a message as newline-delimited JSON."""
-    return (json.dumps(msg, separators=(",", ":")) + "\n").encode()
+    """Encode a message as JSON behind a 4-byte big-endian length."""
+    payload = _json.dumps(msg)
+    return len(payload).to_bytes(4, "big") + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes | None:
+    n = int.from_bytes(await reader.readexactly(4), "big")
+    if n > MAX_FRAME:
+        return None
+    return await reader.readexactly(n)
 
 
 async def read_msg(reader: asyncio.StreamReader) -> dict | None:
-    """Read one newline-delimited JSON message. Returns None on EOF/error."""
+    """Read one length-prefixed JSON message. Returns None on EOF/error."""
     try:
-        line = await asyncio.wait_for(reader.readline(), timeout=30.0)
-    except (asyncio.TimeoutError, ConnectionError, OSError):
+        body = await asyncio.wait_for(_read_frame(reader), timeout=30.0)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
         return None
-    if not line:
+    if body is None:
+        log.warning("Dropping oversized frame")
         return None
     try:
-        return json.loads(line.decode())
-    except (json.JSONDecodeError, UnicodeDecodeError):
+        if len(body) > OFFLOAD_PARSE:
+            return await asyncio.to_thread(_json.loads, body)
+        return _json.loads(body)
+    except ValueError:  # JSONDecodeError, UnicodeDecodeError
         return None
 
 
@@ -40,8 +60,9 @@ class JukeboxServer:
 
     def __init__(self, port: int = DEFAULT_PORT) -> None:
         self.port = port
-        self._clients: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._clients: dict[asyncio.Task, asyncio.Queue[bytes]] = {}
         self._server: asyncio.Server | None = None
+        self._last_sync: bytes | None = None
         self.on_add: Callable[[dict], None] | None = None
 
     async def start(self) -> None:
@@ -53,11 +74,13 @@ class JukeboxServer:
     async def stop(self) -> None:
         if self._server:
             self._server.close()
-            await self._server.wait_closed()
-        for task, writer in list(self._clients.items()):
+        # Each handler closes its own writer on the way out. This has to
+        # happen before wait_closed(), which waits for open connections.
+        for task in list(self._clients):
             task.cancel()
-            writer.close()
         self._clients.clear()
+        if self._server:
+            await self._server.wait_closed()
 
     async def _handle_client(
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
@@ -65,24 +88,64 @@ class JukeboxServer:
         addr = writer.get_extra_info("peername")
         log.info("Client connected: %s", addr)
         task = asyncio.current_task()
-        self._clients[task] = writer
+        outbox: asyncio.Queue[bytes] = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self._clients[task] = outbox
+        # Ticks only carry the playhead, so bring newcomers up to date
+        if self._last_sync:
+            outbox.put_nowait(self._last_sync)
+        pump = asyncio.create_task(self._pump(outbox, writer))
         try:
             while True:
                 msg = await read_msg(reader)
                 if msg is None:
                     break
-                self._process(msg, writer)
+                version = msg.get("version")
+                if msg.get("type") == "hello" and version != PROTOCOL_VERSION:
+                    log.warning(
+                        "Client %s speaks protocol %s, expected %d",
+                        addr,
+                        version,
+                        PROTOCOL_VERSION,
+                    )
+                    break
+                self._process(msg, outbox)
         except (ConnectionError, asyncio.CancelledError):
             pass
         finally:
             log.info("Client disconnected: %s", addr)
             self._clients.pop(task, None)
+            pump.cancel()
             try:
                 writer.close()
             except OSError:
                 pass
 
-    def _process(self, msg: dict, writer: asyncio.StreamWriter) -> None:
+    @staticmethod
+    async def _pump(outbox: asyncio.Queue[bytes], writer: asyncio.StreamWriter) -> None:
+        """Write queued messages to one client, waiting for it to drain."""
+        try:
+            while True:
+                data = await outbox.get()
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            # Unblocks the handler's read loop, which then cleans up
+            writer.close()
+
+    def _send(self, outbox: asyncio.Queue[bytes], data: bytes) -> None:
+        try:
+            outbox.put_nowait(data)
+        except asyncio.QueueFull:
+            # Client is falling behind. Its backlog may hold a sync that a
+            # later tick depends on, so replace it with the latest full
+            # state instead of just dropping the oldest message.
+            while not outbox.empty():
+                outbox.get_nowait()
+            if self._last_sync and data is not self._last_sync:
+                outbox.put_nowait(self._last_sync)
+            outbox.put_nowait(data)
+
+    def _process(self, msg: dict, outbox: asyncio.Queue[bytes]) -> None:
         mtype = msg.get("type")
         if mtype == "add" and isinstance(msg.get("entry"), dict):
             entry = msg["entry"]
@@ -90,26 +153,24 @@ class JukeboxServer:
             if "id" in entry and "title" in entry:
                 if self.on_add:
                     self.on_add(entry)
-                try:
-                    writer.write(
-                        encode_msg({"type": "ack", "title": entry.get("title", "?")})
-                    )
-                except (ConnectionError, OSError):
-                    pass
+                self._send(
+                    outbox,
+                    encode_msg({"type": "ack", "title": entry.get("title", "?")}),
+                )
 
     def broadcast(self, msg: dict) -> None:
-        """Send a message to all connected clients. Fire-and-forget."""
-        if not self._clients:
+        """Queue a message for all connected clients. Fire-and-forget.
+
+        The latest "sync" is kept and replayed to clients that join later.
+        """
+        if msg.get("type") == "sync":
+            data = self._last_sync = encode_msg(msg)
+        elif not self._clients:
             return
-        data = encode_msg(msg)
-        dead: list[asyncio.Task] = []
-        for task, writer in self._clients.items():
-            try:
-                writer.write(data)
-            except (ConnectionError, OSError):
-                dead.append(task)
-        for task in dead:
-            self._clients.pop(task, None)
+        else:
+            data = encode_msg(msg)
+        for outbox in self._clients.values():
+            self._send(outbox, data)
 
     @property
     def client_count(self) -> int:
@@ -141,7 +202,9 @@ class JukeboxClient:
                 timeout=5.0,
             )
             self._connected = True
-            self._writer.write(encode_msg({"type": "hello"}))
+            self._writer.write(
+                encode_msg({"type": "hello", "version": PROTOCOL_VERSION})
+            )
             await self._writer.drain()
             return True
         except (OSError, asyncio.TimeoutError):
@@ -154,7 +217,7 @@ class JukeboxClient:
             if msg is None:
                 self._connected = False
                 break
-            if msg.get("type") == "sync" and self.on_sync:
+            if msg.get("type") in ("sync", "tick") and self.on_sync:
                 self.on_sync(msg)
 
     async def send_add(self, entry: dict) -> None:
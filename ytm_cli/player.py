@@ -1,32 +1,214 @@
 """mpv IPC controller for ytm."""
 
-import json
+import atexit
+import functools
+import itertools
+import logging
 import os
+import selectors
 import socket
 import subprocess
 import tempfile
 import threading
 import time
+from concurrent.futures import Future
+from typing import Callable
+
+from ytm_cli import _json
+
+log = logging.getLogger(__name__)
+# Keep reader errors off the terminal Textual is drawing on
+log.addHandler(logging.NullHandler())
+
+# Properties mpv pushes to us as they change (observe_property), each
+# mirrored into a plain attribute, with the value used while it's unset
+OBSERVED: dict[str, tuple[str, object]] = {
+    "playback-time": ("position", 0.0),
+    "duration": ("duration", 0.0),
+    "pause": ("paused", False),
+    "volume": ("volume", 100.0),
+}
+# Initial size of the reply buffer; grown if a single line outgrows it
+RECV_BUF = 65536
+# How long play() waits for mpv's IPC socket to accept connections
+CONNECT_TIMEOUT = 3.0
+# How long a command waits for mpv's reply
+REPLY_TIMEOUT = 0.2
+# set_volume() calls within this window are sent to mpv as one
+VOLUME_FLUSH = 0.03
+# How long stop() lets mpv act on "quit" before killing it
+QUIT_GRACE = 0.1
+# Encoded commands kept for reuse; one-off ones (loadfile URLs) beyond this
+# are encoded per call
+REQ_CACHE_SIZE = 64
+
+
+# Decode bare success replies without a JSON parse (see _fast_reply). Only
+# pays off against the stdlib parser; orjson is quicker than the slicing.
+# Relies on mpv's serialisation; switch off if a release changes it.
+_FAST_PARSE = _json.orjson is None
+_REPLY_BARE = b'{"request_id":'
+_REPLY_OK = b',"error":"success"}'
+
+# Hand-encoded requests for the fixed-shape controls, up to the request id
+# (see _request); the rest go through _encode
+_TOGGLE_PAUSE = b'{"command":["cycle","pause"],"request_id":'
+_SEEK = b'{"command":["seek",%.6f,"relative"],"request_id":'
+_SET_VOLUME = b'{"command":["set_property","volume",%.3f],"request_id":'
+
+
+def _fast_reply(line: memoryview) -> dict | None:
+    """Decode a data-less success reply by its fixed shape, else None.
+
+    mpv answers commands like cycle, seek and set_property with exactly
+    {"request_id":N,"error":"success"}, so only N needs reading.
+    """
+    end = len(line) - len(_REPLY_OK)
+    if (
+        end <= len(_REPLY_BARE)
+        or line[end:] != _REPLY_OK
+        or line[: len(_REPLY_BARE)] != _REPLY_BARE
+    ):
+        return None
+    try:
+        req_id = int(bytes(line[len(_REPLY_BARE) : end]))
+    except ValueError:
+        return None
+    return {"request_id": req_id, "error": "success"}
+
+# One reader thread serves every player: each IPC socket is registered with
+# this selector, its key's data being the owning MpvPlayer
+_SELECTOR = selectors.DefaultSelector()
+_reader: threading.Thread | None = None
+_reader_lock = threading.Lock()
+
+
+def _read_loop() -> None:
+    """Shared reader thread: hand each readable socket to its player."""
+    while True:
+        for key, _ in _SELECTOR.select(timeout=0.5):
+            key.data._on_readable(key.fileobj)
+
+
+def _watch(sock: socket.socket, player: "MpvPlayer") -> None:
+    global _reader
+    _SELECTOR.register(sock, selectors.EVENT_READ, player)
+    with _reader_lock:
+        if _reader is None:
+            _reader = threading.Thread(target=_read_loop, daemon=True)
+            _reader.start()
+
+
+def _unwatch(sock: socket.socket) -> None:
+    try:
+        _SELECTOR.unregister(sock)
+    except (KeyError, ValueError):
+        # Already dropped at EOF, or never registered
+        pass
+
+
+def _remove_socket(socket_path: str) -> None:
+    """Remove an IPC socket and the private directory holding it."""
+    for remove, path in (
+        (os.unlink, socket_path),
+        (os.rmdir, os.path.dirname(socket_path)),
+    ):
+        try:
+            remove(path)
+        except OSError:
+            pass
+
+
+def _cleanup(proc: subprocess.Popen, socket_path: str) -> None:
+    """Last-resort teardown for a player that was never stopped.
+
+    Registered with atexit for each spawn, so it must not block:
+    kill mpv outright and remove its socket.
+    """
+    if proc.poll() is None:
+        proc.kill()
+    _remove_socket(socket_path)
 
 
 class MpvPlayer:
-    """Controls mpv playback via JSON IPC socket."""
+    """Controls mpv playback via JSON IPC socket.
+
+    ``position``, ``duration``, ``paused`` and ``volume`` are plain
+    attributes, kept current by the reader thread from mpv's property
+    change events.
+    """
+
+    __slots__ = (
+        "_socket_path",
+        "_proc",
+        "_sock",
+        "_recvbuf",
+        "_recv_view",
+        "_recv_start",
+        "_recv_end",
+        "_send_lock",
+        "_ids",
+        "_pending",
+        "_req_cache",
+        "_pending_volume",
+        "_volume_timer",
+        "position",
+        "duration",
+        "paused",
+        "volume",
+        "_exit_hook",
+    )
+
+    position: float
+    duration: float
+    paused: bool
+    volume: float
 
     def __init__(self) -> None:
-        self._socket_path = os.path.join(
-            tempfile.gettempdir(), f"ytm-mpv-{os.getpid()}"
-        )
+        # mpv's IPC socket, in a fresh 0700 directory per spawn so other
+        # users can't reach it and a stale socket can't get in the way
+        self._socket_path = ""
         self._proc: subprocess.Popen | None = None
         self._sock: socket.socket | None = None
-        self._lock = threading.Lock()
+        # Reader thread's receive buffer, filled in place with recv_into;
+        # unread data lives in [_recv_start, _recv_end)
+        self._recvbuf = bytearray(RECV_BUF)
+        self._recv_view = memoryview(self._recvbuf)
+        self._recv_start = 0
+        self._recv_end = 0
+        # Held only while writing one request, so concurrent sendall()s
+        # can't interleave; replies are matched by request_id
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, Future] = {}
+        self._req_cache: dict[tuple, bytes] = {}
+        # Latest unsent set_volume() value and the timer that will send it
+        self._pending_volume: float | None = None
+        self._volume_timer: threading.Timer | None = None
+        self._exit_hook: Callable[[], None] | None = None
+        self._reset_observed()
+
+    def _reset_observed(self) -> None:
+        for attr, default in OBSERVED.values():
+            setattr(self, attr, default)
 
     @property
     def is_running(self) -> bool:
         return self._proc is not None and self._proc.poll() is None
 
     def play(self, stream_url: str, title: str = "") -> bool:
-        """Start playing a stream. Returns True on success."""
+        """Start playing a stream. Returns True on success.
+
+        A running mpv is reused: the stream replaces the current one over
+        IPC. A new process is only spawned when none is running (mpv exits
+        at the end of each track, which is how the app detects it) or if
+        the replace fails.
+        """
+        if self.is_running and self._replace(stream_url, title):
+            return True
         self.stop()
+        ipc_dir = tempfile.mkdtemp(prefix="ytm-")
+        self._socket_path = os.path.join(ipc_dir, "mpv.sock")
         try:
             self._proc = subprocess.Popen(
                 [
@@ -41,52 +223,139 @@ class MpvPlayer:
                 stderr=subprocess.DEVNULL,
             )
         except FileNotFoundError:
+            os.rmdir(ipc_dir)
+            self._socket_path = ""
             return False
+        # Kills this mpv if the interpreter exits without stop(); stop()
+        # unregisters it. A partial per spawn, so unregistering it leaves
+        # other players' hooks alone.
+        self._exit_hook = functools.partial(
+            _cleanup, self._proc, self._socket_path
+        )
+        atexit.register(self._exit_hook)
 
-        # Wait for IPC socket
-        for _ in range(30):
-            if os.path.exists(self._socket_path):
-                break
-            time.sleep(0.1)
-        else:
-            return False
+        # mpv creates the IPC socket shortly after starting; retry connect
+        # with backoff rather than polling the filesystem for it
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        delay = 0.001
+        while not self._connect():
+            if time.monotonic() >= deadline or self._proc.poll() is not None:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.025)
+        return True
 
-        return self._connect()
+    def _replace(self, stream_url: str, title: str) -> bool:
+        result = self._command("loadfile", stream_url, "replace")
+        if not result or result.get("error") != "success":
+            return False
+        # Match a freshly spawned mpv: old track's progress gone, unpaused
+        self.position = self.duration = 0.0
+        self.paused = False
+        self._command("set_property", "pause", False)
+        self._command("set_property", "title", title)
+        return True
 
     def _connect(self) -> bool:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         try:
-            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            self._sock.connect(self._socket_path)
-            self._sock.settimeout(0.2)
-            return True
-        except (ConnectionRefusedError, FileNotFoundError, OSError):
-            self._sock = None
+            sock.connect(self._socket_path)
+        except OSError:
+            # Not listening yet; play() retries with a fresh socket
+            sock.close()
             return False
+        self._sock = sock
+        self._recv_start = self._recv_end = 0
+        _watch(self._sock, self)
+        for i, name in enumerate(OBSERVED, 1):
+            self._command("observe_property", i, name)
+        return True
 
-    def _command(self, *args: str | float) -> dict | None:
-        with self._lock:
-            if not self._sock:
-                return None
+    def _on_readable(self, sock: socket.socket) -> None:
+        """Called on the reader thread: one recv, then dispatch each line."""
+        buf = self._recvbuf
+        # Move a partial line to the front to make room
+        if self._recv_start:
+            n = self._recv_end - self._recv_start
+            buf[:n] = buf[self._recv_start : self._recv_end]
+            self._recv_start, self._recv_end = 0, n
+        if self._recv_end == len(buf):
+            buf = self._recvbuf = buf + bytes(len(buf))
+            self._recv_view = memoryview(buf)
+        try:
+            n = sock.recv_into(self._recv_view[self._recv_end :])
+        except OSError:
+            # Socket shut down or closed by stop()
+            n = 0
+        if not n:
+            _unwatch(sock)
+            return
+        self._recv_end += n
+
+        view = self._recv_view
+        start = self._recv_start
+        while (nl := buf.find(b"\n", start, self._recv_end)) >= 0:
             try:
-                msg = json.dumps({"command": list(args)}) + "\n"
-                self._sock.sendall(msg.encode())
-                buf = b""
-                while True:
-                    try:
-                        chunk = self._sock.recv(4096)
-                        if not chunk:
-                            return None
-                        buf += chunk
-                        while b"\n" in buf:
-                            line, buf = buf.split(b"\n", 1)
-                            data = json.loads(line.decode())
-                            if "event" not in data:
-                                return data
-                    except socket.timeout:
-                        return None
-            except (BrokenPipeError, ConnectionResetError, OSError):
-                self._sock = None
-                return None
+                self._dispatch(view[start:nl])
+            except Exception:
+                # A bad line must not kill the reader every player shares
+                log.exception("Failed to handle mpv IPC line")
+            start = nl + 1
+        self._recv_start = start
+
+    def _dispatch(self, line: memoryview) -> None:
+        """Route a reply to its waiting command, or cache an event."""
+        data = _fast_reply(line) if _FAST_PARSE else None
+        if data is None:
+            try:
+                data = _json.loads(line)
+            except ValueError:
+                return
+        if data.get("event") == "property-change":
+            prop = OBSERVED.get(data.get("name", ""))
+            if prop:
+                value = data.get("data")
+                setattr(self, prop[0], prop[1] if value is None else value)
+        elif "request_id" in data:
+            fut = self._pending.pop(data["request_id"], None)
+            if fut:
+                fut.set_result(data)
+
+    def _command(self, *args: str | float) -> dict | None:
+        return self._request(self._encode(args))
+
+    def _request(self, prefix: bytes) -> dict | None:
+        """Send an encoded request, ending at its request id; await reply."""
+        sock = self._sock
+        if not sock:
+            return None
+        req_id = next(self._ids)
+        fut: Future = Future()
+        self._pending[req_id] = fut
+        try:
+            data = prefix + b"%d}\n" % req_id
+            with self._send_lock:
+                sock.sendall(data)
+            # Other threads' commands can be in flight meanwhile
+            return fut.result(timeout=REPLY_TIMEOUT)
+        except TimeoutError:  # no reply in time
+            return None
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            self._sock = None
+            return None
+        finally:
+            self._pending.pop(req_id, None)
+
+    def _encode(self, args: tuple) -> bytes:
+        """Encoded command up to the request id, cached per args."""
+        prefix = self._req_cache.get(args)
+        if prefix is None:
+            # Drop the closing brace; _request appends the id and closes
+            cmd = _json.dumps({"command": list(args)})[:-1]
+            prefix = cmd + b',"request_id":'
+            if len(self._req_cache) < REQ_CACHE_SIZE:
+                self._req_cache[args] = prefix
+        return prefix
 
     def get_property(self, name: str) -> float | bool | str | None:
         result = self._command("get_property", name)
@@ -94,52 +363,80 @@ class MpvPlayer:
             return result.get("data")
         return None
 
-    @property
-    def position(self) -> float:
-        return self.get_property("playback-time") or 0.0
-
-    @property
-    def duration(self) -> float:
-        return self.get_property("duration") or 0.0
-
-    @property
-    def paused(self) -> bool:
-        return self.get_property("pause") or False
-
-    @property
-    def volume(self) -> float:
-        return self.get_property("volume") or 100.0
-
     def toggle_pause(self) -> None:
-        self._command("cycle", "pause")
+        self._request(_TOGGLE_PAUSE)
 
     def seek(self, seconds: float) -> None:
-        self._command("seek", seconds, "relative")
+        self._request(_SEEK % seconds)
 
     def set_volume(self, vol: float) -> None:
-        self._command("set_property", "volume", max(0.0, min(150.0, vol)))
+        """Set the volume, coalescing rapid calls into one IPC command.
+
+        ``volume`` reflects the new value right away, so repeated relative
+        changes (a held key) build on each other before mpv confirms.
+        """
+        self._pending_volume = self.volume = max(0.0, min(150.0, vol))
+        if self._volume_timer is None:
+            timer = threading.Timer(VOLUME_FLUSH, self._flush_volume)
+            timer.daemon = True
+            self._volume_timer = timer
+            timer.start()
+
+    def _flush_volume(self) -> None:
+        self._volume_timer = None
+        vol, self._pending_volume = self._pending_volume, None
+        if vol is not None:
+            self._request(_SET_VOLUME % vol)
 
     def stop(self) -> None:
+        if self._volume_timer:
+            self._volume_timer.cancel()
+            self._volume_timer = None
+        self._pending_volume = None
+        if self._exit_hook:
+            atexit.unregister(self._exit_hook)
+            self._exit_hook = None
+
         if self._proc and self._proc.poll() is None:
-            self._proc.terminate()
+            # mpv handles "quit" within a few ms; don't wait for its reply,
+            # it may exit before sending one
+            if not self._send_quit():
+                self._proc.terminate()
             try:
-                self._proc.wait(timeout=3)
+                self._proc.wait(timeout=QUIT_GRACE)
             except subprocess.TimeoutExpired:
                 self._proc.kill()
+                try:
+                    self._proc.wait(timeout=0.5)
+                except subprocess.TimeoutExpired:
+                    pass
         self._proc = None
 
         if self._sock:
+            _unwatch(self._sock)
             try:
                 self._sock.close()
             except OSError:
                 pass
             self._sock = None
+        self._reset_observed()
+
+        if self._socket_path:
+            _remove_socket(self._socket_path)
+            self._socket_path = ""
 
+    def _send_quit(self) -> bool:
+        if not self._sock:
+            return False
         try:
-            if os.path.exists(self._socket_path):
-                os.unlink(self._socket_path)
+            with self._send_lock:
+                self._sock.sendall(b'{"command":["quit"]}\n')
         except OSError:
-            pass
+            return False
+        return True
+
+    def __enter__(self) -> "MpvPlayer":
+        return self
 
-    def __del__(self) -> None:
+    def __exit__(self, *exc: object) -> None:
         self.stop()
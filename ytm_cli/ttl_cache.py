@@ -0,0 +1,83 @@
+"""Thread-safe TTL + LRU cache for ytm's blocking yt-dlp lookups."""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, ParamSpec, TypeVar, cast
+
+_MISSING = object()
+# Separates positional from keyword arguments in a ttl_cache key
+_KWD_MARK = object()
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class TTLCache:
+    """Size-capped LRU mapping whose entries expire after ``ttl`` seconds.
+
+    Expired entries are evicted lazily, when they're next looked up.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expiry, value = item
+            if expiry <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def ttl_cache(
+    ttl: float, maxsize: int = 256
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Memoize a function on its arguments for ``ttl`` seconds.
+
+    Like functools.lru_cache, calls spelling the same arguments
+    differently (positionally or by keyword) are cached separately.
+
+    Falsy results (failed or empty lookups) are not cached, so a transient
+    error doesn't stick around for the whole TTL. The backing TTLCache is
+    exposed as ``.cache`` on the wrapper.
+    """
+
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        cache = TTLCache(ttl, maxsize)
+
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            key = (*args, _KWD_MARK, *kwargs.items()) if kwargs else args
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return cast(R, value)
+            result = fn(*args, **kwargs)
+            if result:
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator